@@ -1,30 +1,132 @@
 # backend/app.py
 from flask import Flask, jsonify, request, render_template
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
+from flask_compress import Compress
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError, ServerSelectionTimeoutError
 from bson.objectid import ObjectId
 from datetime import datetime
 import os
+import random
+import re
+import orjson
 
 # Configuration - change MONGO_URI to your MongoDB connection string
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
 DB_NAME = os.environ.get("DB_NAME", "payment_demo_db")
 
+# JSON provider backed by orjson; naive datetimes from Mongo are UTC
+class OrjsonProvider(JSONProvider):
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__, template_folder="templates")
+app.json = OrjsonProvider(app)
 CORS(app)
+# compress JSON/HTML bodies; tiny responses aren't worth it
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 500
+Compress(app)
+# per-process cache; stats are allowed to be a few seconds stale
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache", "CACHE_DEFAULT_TIMEOUT": 15})
+STATS_CACHE_KEY = "api_stats"
 
-client = MongoClient(MONGO_URI)
+# one pooled client per process (gunicorn worker); threads share it.
+# Wire compression is negotiated with the server in the order given.
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=20,
+    minPoolSize=2,
+    waitQueueTimeoutMS=2000,
+    compressors="zstd,zlib",
+    zlibCompressionLevel=6,
+    serverSelectionTimeoutMS=2000,
+    socketTimeoutMS=5000,
+    retryWrites=True
+)
 db = client[DB_NAME]
 txns = db["transactions"]
 edits = db["edits"]
 
+# Indexes backing the sorts/filters used by the API (no-ops if they already exist).
+# Each build is guarded separately and failures are logged, not raised, so one
+# bad index doesn't skip the rest and the app still starts without a reachable DB.
+def ensure_index(coll, keys, **kwargs):
+    try:
+        coll.create_index(keys, background=True, **kwargs)
+        return True
+    except ServerSelectionTimeoutError:
+        # no server at all - let ensure_indexes stop instead of waiting per index
+        raise
+    except PyMongoError as e:
+        app.logger.warning("Could not create index %s on %s: %s", keys, coll.name, e)
+        return False
+
+def ensure_indexes():
+    try:
+        ensure_index(txns, [("timestamp", -1)])
+        if not ensure_index(txns, "txn_id", unique=True):
+            # e.g. existing data has duplicate txn_ids - fall back to a plain index
+            ensure_index(txns, "txn_id")
+        ensure_index(txns, [("status", 1), ("timestamp", -1)])
+        ensure_index(txns, [("channel", 1), ("timestamp", -1)])
+        ensure_index(txns, [("payer", "text"), ("payee", "text")])
+        ensure_index(edits, [("edited_at", -1)])
+    except ServerSelectionTimeoutError as e:
+        app.logger.warning("MongoDB unreachable, skipping index creation: %s", e)
+
+ensure_indexes()
+
+# Fields needed by the table views (qt client + dashboard)
+TXN_LIST_PROJECTION = {
+    "_id": 0, "txn_id": 1, "payer": 1, "payee": 1, "amount": 1,
+    "channel": 1, "status": 1, "timestamp": 1
+}
+EDIT_LIST_PROJECTION = {
+    "_id": 0, "txn_id": 1, "field": 1, "old_value": 1, "new_value": 1,
+    "edited_by": 1, "edited_at": 1
+}
+
+# Fields a PUT /api/transactions/<txn_id> may change
+ALLOWED_FIELDS = frozenset({"status", "amount", "payee", "channel", "remarks", "operator"})
+
+# Sample pools for /api/seed
+SEED_CHANNELS = ("UPI", "NEFT", "RTGS", "IMPS")
+SEED_STATUSES = ("Pending", "Success", "Failed")
+SEED_PAYERS = ("Alice", "Bob", "Charlie", "Diana", "Eve", "Frank")
+SEED_PAYEES = ("MerchantA", "MerchantB", "StoreX", "VendorY")
+
+# Static tail of the /api/stats pipeline: one pass over today's docs
+# computes all three rollups. Only the $match date varies per call.
+STATS_FACET_STAGE = {"$facet": {
+    "total": [
+        {"$group": {"_id": None, "total_count": {"$sum": 1}, "total_volume": {"$sum": "$amount"}}}
+    ],
+    # channel split
+    "channel_data": [
+        {"$group": {"_id": "$channel", "count": {"$sum": 1}, "volume": {"$sum": "$amount"}}}
+    ],
+    # status split
+    "status_data": [
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]
+}}
+
 # Helper: convert Mongo doc -> JSON-serializable dict
 def doc_to_json(doc):
     if not doc:
         return None
-    out = {k: v for k, v in doc.items()}
-    out["_id"] = str(out["_id"])
-    return out
+    # stringify in place; docs projected without _id pass through untouched
+    if "_id" in doc:
+        doc["_id"] = str(doc["_id"])
+    return doc
 
 @app.route("/")
 def index():
@@ -36,6 +138,8 @@ def index():
 def get_transactions():
     q = {}
     # support searching by txn_id, payer, payee, status
+    # "search" matches either payer or payee
+    search = request.args.get("search")
     txn_id = request.args.get("txn_id")
     payer = request.args.get("payer")
     payee = request.args.get("payee")
@@ -51,10 +155,32 @@ def get_transactions():
     if status:
         q["status"] = status
 
-    cursor = txns.find(q).sort("timestamp", -1).limit(limit)
-    data = [doc_to_json(d) for d in cursor]
+    if search:
+        data = search_transactions(q, search, limit)
+    else:
+        data = find_transactions(q, limit)
     return jsonify(data), 200
 
+def find_transactions(q, limit):
+    # _id is projected out, so cursor docs serialize as-is
+    cursor = (txns.find(q, projection=TXN_LIST_PROJECTION)
+              .sort("timestamp", -1).limit(limit).batch_size(max(0, min(limit, 500))))
+    return list(cursor)
+
+# Match "search" against payer or payee: whole words via the text index plus
+# a case-insensitive prefix on either field (so "Eve" also finds "Evergreen")
+def search_transactions(q, search, limit):
+    prefix = {"$regex": f"^{re.escape(search)}", "$options": "i"}
+    data = find_transactions({**q, "$or": [{"payer": prefix}, {"payee": prefix}]}, limit)
+    try:
+        data += find_transactions({**q, "$text": {"$search": search}}, limit)
+    except OperationFailure:
+        # text index missing (build failed or not created yet) - prefix only
+        pass
+    merged = {d.get("txn_id"): d for d in data}.values()
+    data = sorted(merged, key=lambda d: d.get("timestamp") or datetime.min, reverse=True)
+    return data[:abs(limit)] if limit else data
+
 # API: get single transaction by txn_id
 @app.route("/api/transactions/<txn_id>", methods=["GET"])
 def get_transaction(txn_id):
@@ -66,12 +192,11 @@ def get_transaction(txn_id):
 # API: update allowed fields for a transaction (PUT)
 @app.route("/api/transactions/<txn_id>", methods=["PUT"])
 def update_transaction(txn_id):
-    payload = request.get_json(force=True)
-    allowed_fields = {"status", "amount", "payee", "channel", "remarks", "operator"}
-    update = {}
-    for k, v in payload.items():
-        if k in allowed_fields:
-            update[k] = v
+    # non-JSON or malformed bodies fall through to the 400 below
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        payload = {}
+    update = {k: v for k, v in payload.items() if k in ALLOWED_FIELDS}
 
     if not update:
         return jsonify({"error": "No updatable fields provided"}), 400
@@ -81,93 +206,113 @@ def update_transaction(txn_id):
     if not existing:
         return jsonify({"error": "Transaction not found"}), 404
 
-    # Build patch and log each changed field
+    # Build patch of only the changed fields and log each one
+    update = {k: v for k, v in update.items() if existing.get(k) != v}
     changes = []
+    now = datetime.utcnow()
     for k, v in update.items():
-        old = existing.get(k)
-        if old != v:
-            changes.append({
-                "txn_id": txn_id,
-                "field": k,
-                "old_value": old,
-                "new_value": v,
-                "edited_by": payload.get("operator", "operator_unknown"),
-                "edited_at": datetime.utcnow()
-            })
-
-    if changes:
-        # apply update
-        txns.update_one({"txn_id": txn_id}, {"$set": update})
-        # insert edits
-        for c in changes:
-            edits.insert_one(c)
-
-    # Return updated document
-    updated = txns.find_one({"txn_id": txn_id})
+        changes.append({
+            "txn_id": txn_id,
+            "field": k,
+            "old_value": existing.get(k),
+            "new_value": v,
+            "edited_by": payload.get("operator", "operator_unknown"),
+            "edited_at": now
+        })
+
+    if not changes:
+        # no-op edit: nothing to write, the fetched doc is current and has
+        # the same shape as the write path's (full doc, _id stringified)
+        return jsonify(doc_to_json(existing)), 200
+
+    updated = apply_update(txn_id, update, changes)
+    if updated is None:
+        return jsonify({"error": "Transaction not found"}), 404
+    cache.delete(STATS_CACHE_KEY)
     return jsonify(doc_to_json(updated)), 200
 
+# Apply an update and its edit-log entries; atomically when the deployment
+# supports transactions (replica set / sharded), plain writes on a standalone.
+# Returns None (and logs nothing) if the transaction no longer exists.
+def apply_update(txn_id, update, changes):
+    def write(session=None):
+        # apply update first; log edits only once it has succeeded
+        updated = txns.find_one_and_update(
+            {"txn_id": txn_id},
+            {"$set": update},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if updated is None:
+            # deleted since it was read - nothing was changed, so log nothing
+            if session is not None:
+                session.abort_transaction()
+            return None
+        edits.insert_many(changes, ordered=False, session=session)
+        return updated
+
+    if client.topology_description.topology_type_name == "Single":
+        return write()
+    with client.start_session() as session:
+        return session.with_transaction(write)
+
 # API: seed endpoint (convenience) - BE CAREFUL on prod; here for demo
 @app.route("/api/seed", methods=["POST"])
 def seed_endpoint():
     # optional: accept count or use default sample data
     sample_count = int(request.json.get("count", 10)) if request.json else 10
-    from random import choice, randint
-    channels = ["UPI", "NEFT", "RTGS", "IMPS"]
-    statuses = ["Pending", "Success", "Failed"]
-    sample = []
-    for i in range(sample_count):
-        txn = {
-            "txn_id": f"TXN{100000 + randint(0, 899999)}",
-            "payer": choice(["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank"]),
-            "payee": choice(["MerchantA", "MerchantB", "StoreX", "VendorY"]),
-            "amount": round(randint(100, 200000) + randint(0,99)/100, 2),
-            "channel": choice(channels),
-            "status": choice(statuses),
-            "timestamp": datetime.utcnow(),
+    now = datetime.utcnow()
+    # draw each column in one C-level call; txn_ids are distinct within the batch
+    txn_nums = random.sample(range(100000, 1000000), sample_count)
+    payers = random.choices(SEED_PAYERS, k=sample_count)
+    payees = random.choices(SEED_PAYEES, k=sample_count)
+    rupees = random.choices(range(100, 200001), k=sample_count)
+    paise = random.choices(range(100), k=sample_count)
+    channels = random.choices(SEED_CHANNELS, k=sample_count)
+    statuses = random.choices(SEED_STATUSES, k=sample_count)
+    sample = [
+        {
+            "txn_id": f"TXN{txn_nums[i]}",
+            "payer": payers[i],
+            "payee": payees[i],
+            "amount": round(rupees[i] + paise[i]/100, 2),
+            "channel": channels[i],
+            "status": statuses[i],
+            "timestamp": now,
             "remarks": ""
         }
-        sample.append(txn)
-    txns.insert_many(sample)
-    return jsonify({"inserted": len(sample)}), 201
+        for i in range(sample_count)
+    ]
+    try:
+        inserted = len(txns.insert_many(sample, ordered=False, bypass_document_validation=True).inserted_ids)
+    except BulkWriteError as e:
+        # some txn_ids collided with existing ones (unique index); the rest went in.
+        # Anything other than duplicate keys is a real failure.
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])) \
+                or e.details.get("writeConcernErrors"):
+            raise
+        inserted = e.details.get("nInserted", 0)
+    cache.delete(STATS_CACHE_KEY)
+    return jsonify({"inserted": inserted}), 201
 
 # API: stats for manager dashboard
 @app.route("/api/stats", methods=["GET"])
+@cache.cached(timeout=15, key_prefix=STATS_CACHE_KEY)
 def stats():
     # total count and total volume (today)
-    from datetime import datetime, timedelta
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    pipeline_total = [
-        {"$match": {"timestamp": {"$gte": today_start}}},
-        {"$group": {"_id": None, "total_count": {"$sum": 1}, "total_volume": {"$sum": "$amount"}}}
-    ]
-    tot = list(txns.aggregate(pipeline_total))
+    pipeline = [{"$match": {"timestamp": {"$gte": today_start}}}, STATS_FACET_STAGE]
+    res = list(txns.aggregate(pipeline))
+    facets = res[0] if res else {}
+    tot = facets.get("total", [])
     total_count = tot[0]["total_count"] if tot else 0
     total_volume = tot[0]["total_volume"] if tot else 0.0
-
-    # channel split
-    pipeline_channel = [
-        {"$match": {"timestamp": {"$gte": today_start}}},
-        {"$group": {"_id": "$channel", "count": {"$sum": 1}, "volume": {"$sum": "$amount"}}}
-    ]
-    channel_data = list(txns.aggregate(pipeline_channel))
-
-    # status split
-    pipeline_status = [
-        {"$match": {"timestamp": {"$gte": today_start}}},
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    status_data = list(txns.aggregate(pipeline_status))
+    channel_data = facets.get("channel_data", [])
+    status_data = facets.get("status_data", [])
 
     # recent edits (last N)
-    recent_edits_cursor = edits.find().sort("edited_at", -1).limit(10)
-    recent_edits = []
-    for e in recent_edits_cursor:
-        e2 = {k: v for k, v in e.items()}
-        e2["_id"] = str(e2["_id"])
-        # format datetime
-        if isinstance(e2.get("edited_at"), datetime):
-            e2["edited_at"] = e2["edited_at"].isoformat() + "Z"
-        recent_edits.append(e2)
+    recent_edits_cursor = edits.find({}, projection=EDIT_LIST_PROJECTION).sort("edited_at", -1).limit(10)
+    recent_edits = list(recent_edits_cursor)
 
     return jsonify({
         "total_count": total_count,
@@ -180,10 +325,13 @@ def stats():
 # API: recent transactions (for quick feed)
 @app.route("/api/recent", methods=["GET"])
 def recent():
-    cursor = txns.find().sort("timestamp", -1).limit(20)
-    data = [doc_to_json(d) for d in cursor]
-    return jsonify(data), 200
+    data = find_transactions({}, 20)
+    # clients polling with If-None-Match get an empty 304 when nothing changed
+    resp = jsonify(data)
+    resp.add_etag()
+    return resp.make_conditional(request)
 
 if __name__ == "__main__":
+    # dev server only - use wsgi.py under gunicorn otherwise
     print(f"Using MongoDB URI: {MONGO_URI}, DB: {DB_NAME}")
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    app.run(host="127.0.0.1", port=5000, debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True)
@@ -1,7 +1,7 @@
 # backend/seed_data.py
 from pymongo import MongoClient
 from datetime import datetime, timedelta
-import random
+import numpy as np
 import os
 
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
@@ -18,20 +18,28 @@ def seed(n=30):
     channels = ["UPI", "NEFT", "RTGS", "IMPS"]
     statuses = ["Pending", "Success", "Failed"]
     now = datetime.utcnow()
-    docs = []
-    for i in range(n):
-        doc = {
+    # sample every column at once; tolist() gives plain Python types for BSON
+    rng = np.random.default_rng()
+    payer_idx = rng.integers(0, len(payers), n).tolist()
+    payee_idx = rng.integers(0, len(payees), n).tolist()
+    channel_idx = rng.integers(0, len(channels), n).tolist()
+    amounts = np.round(rng.uniform(10, 200000, n), 2).tolist()
+    status_idx = rng.choice(len(statuses), size=n, p=[0.2, 0.6, 0.2]).tolist()
+    mins = rng.integers(0, 60*24, n, endpoint=True).tolist()
+    docs = [
+        {
             "txn_id": f"TXN{100000+i}",
-            "payer": random.choice(payers),
-            "payee": random.choice(payees),
-            "amount": round(random.uniform(10, 200000), 2),
-            "channel": random.choice(channels),
-            "status": random.choices(statuses, weights=[0.2, 0.6, 0.2])[0],
-            "timestamp": now - timedelta(minutes=random.randint(0, 60*24)),
+            "payer": payers[payer_idx[i]],
+            "payee": payees[payee_idx[i]],
+            "amount": amounts[i],
+            "channel": channels[channel_idx[i]],
+            "status": statuses[status_idx[i]],
+            "timestamp": now - timedelta(minutes=mins[i]),
             "remarks": ""
         }
-        docs.append(doc)
-    txns.insert_many(docs)
+        for i in range(n)
+    ]
+    txns.insert_many(docs, ordered=False)
     print(f"Inserted {len(docs)} transactions.")
 
 if __name__ == "__main__":
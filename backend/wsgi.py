@@ -0,0 +1,6 @@
+# backend/wsgi.py
+# Production entrypoint - run from the backend/ directory:
+#   gunicorn -w 4 -k gthread --threads 8 -b 127.0.0.1:5000 wsgi:app
+# Each worker imports app.py itself (no --preload), so every process gets
+# its own MongoClient connection pool.
+from app import app
@@ -1,10 +1,15 @@
 # frontend/qt_client.py
 import sys
-import requests
+from urllib.parse import urlencode
+import orjson
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem, QMessageBox, QComboBox)
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QUrl
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
 
 API_BASE = "http://127.0.0.1:5000/api"
+REQUEST_TIMEOUT_MS = 5000
+# doc keys shown in the table, in column order
+TABLE_FIELDS = ["txn_id","payer","payee","amount","channel","status","timestamp"]
 
 class OperatorConsole(QWidget):
     def __init__(self):
@@ -69,31 +74,84 @@ class OperatorConsole(QWidget):
         self.setLayout(layout)
 
         self.current_txn_id = None
+        # async HTTP on the Qt event loop (keeps connections alive per host)
+        self.nam = QNetworkAccessManager(self)
+        # ETag of the /recent list currently shown in the table, if any
+        self.recent_etag = None
+        # latest in-flight reply per action ("table", "txn"); older ones are stale
+        self.pending = {}
         self.load_recent()
 
+    def api_request(self, path, params=None, payload=None, etag=None):
+        # GET, or PUT when a payload is given; returns the pending reply
+        url = f"{API_BASE}{path}"
+        if params:
+            url += "?" + urlencode(params)
+        req = QNetworkRequest(QUrl(url))
+        req.setTransferTimeout(REQUEST_TIMEOUT_MS)
+        if etag:
+            req.setRawHeader(b"If-None-Match", etag.encode())
+        if payload is None:
+            return self.nam.get(req)
+        req.setHeader(QNetworkRequest.ContentTypeHeader, "application/json")
+        return self.nam.put(req, orjson.dumps(payload))
+
+    def track(self, action, reply):
+        # replies can finish out of order - abort the previous request for
+        # this action so only the newest one updates the UI
+        prev = self.pending.get(action)
+        self.pending[action] = reply
+        if prev is not None and prev.isRunning():
+            prev.abort()
+
+    def is_stale(self, action, reply):
+        if self.pending.get(action) is reply:
+            del self.pending[action]
+            return False
+        reply.deleteLater()
+        return True
+
+    def read_json(self, reply):
+        # raises on network/HTTP errors so handlers can report them
+        reply.deleteLater()
+        if reply.error() != QNetworkReply.NoError:
+            raise IOError(reply.errorString())
+        if reply.attribute(QNetworkRequest.HttpStatusCodeAttribute) == 304:
+            return None  # unchanged since the ETag we sent
+        return orjson.loads(bytes(reply.readAll()))
+
     def load_recent(self):
+        reply = self.api_request("/recent", etag=self.recent_etag)
+        self.track("table", reply)
+        reply.finished.connect(lambda: self.on_recent_loaded(reply))
+
+    def on_recent_loaded(self, reply):
+        if self.is_stale("table", reply):
+            return
         try:
-            r = requests.get(f"{API_BASE}/recent", timeout=5)
-            r.raise_for_status()
-            data = r.json()
+            data = self.read_json(reply)
+            if data is None:
+                return  # table already shows this list
             self.populate_table(data)
+            self.recent_etag = bytes(reply.rawHeader(b"ETag")).decode() or None
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not fetch recent transactions:\n{e}")
 
     def populate_table(self, data):
-        self.table.setRowCount(0)
-        for doc in data:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(doc.get("txn_id","")))
-            self.table.setItem(row, 1, QTableWidgetItem(doc.get("payer","")))
-            self.table.setItem(row, 2, QTableWidgetItem(doc.get("payee","")))
-            self.table.setItem(row, 3, QTableWidgetItem(str(doc.get("amount",""))))
-            self.table.setItem(row, 4, QTableWidgetItem(doc.get("channel","")))
-            self.table.setItem(row, 5, QTableWidgetItem(doc.get("status","")))
-            ts = doc.get("timestamp")
-            ts_str = ts if isinstance(ts,str) else (str(ts) if ts else "")
-            self.table.setItem(row, 6, QTableWidgetItem(ts_str))
+        # fill in one pass with repaints/sorting off, then refresh once
+        self.recent_etag = None
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.table.setUpdatesEnabled(False)
+        self.table.clearContents()
+        self.table.setRowCount(len(data))
+        for row, doc in enumerate(data):
+            for col, key in enumerate(TABLE_FIELDS):
+                val = doc.get(key)
+                text = val if isinstance(val, str) else ("" if val is None else str(val))
+                self.table.setItem(row, col, QTableWidgetItem(text))
+        self.table.setSortingEnabled(sorting)
+        self.table.setUpdatesEnabled(True)
 
     def search(self):
         q = self.search_input.text().strip()
@@ -106,22 +164,31 @@ class OperatorConsole(QWidget):
             params["txn_id"] = q
         else:
             # search payer or payee
-            params["payer"] = q
-            params["payee"] = q
+            params["search"] = q
+        reply = self.api_request("/transactions", params=params)
+        self.track("table", reply)
+        reply.finished.connect(lambda: self.on_search_done(reply))
+
+    def on_search_done(self, reply):
+        if self.is_stale("table", reply):
+            return
         try:
-            r = requests.get(f"{API_BASE}/transactions", params=params, timeout=5)
-            r.raise_for_status()
-            data = r.json()
+            data = self.read_json(reply)
             self.populate_table(data)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Search failed:\n{e}")
 
     def on_cell_clicked(self, row, col):
         txn_id = self.table.item(row, 0).text()
+        reply = self.api_request(f"/transactions/{txn_id}")
+        self.track("txn", reply)
+        reply.finished.connect(lambda: self.on_txn_loaded(reply, txn_id))
+
+    def on_txn_loaded(self, reply, txn_id):
+        if self.is_stale("txn", reply):
+            return
         try:
-            r = requests.get(f"{API_BASE}/transactions/{txn_id}", timeout=5)
-            r.raise_for_status()
-            doc = r.json()
+            doc = self.read_json(reply)
             self.current_txn_id = txn_id
             self.selected_label.setText(f"Selected: {txn_id}")
             self.payee_input.setText(doc.get("payee",""))
@@ -148,10 +215,12 @@ class OperatorConsole(QWidget):
         }
         # remove None values
         payload = {k:v for k,v in payload.items() if v is not None}
+        reply = self.api_request(f"/transactions/{self.current_txn_id}", payload=payload)
+        reply.finished.connect(lambda: self.on_saved(reply))
+
+    def on_saved(self, reply):
         try:
-            r = requests.put(f"{API_BASE}/transactions/{self.current_txn_id}", json=payload, timeout=5)
-            r.raise_for_status()
-            updated = r.json()
+            updated = self.read_json(reply)
             QMessageBox.information(self, "Saved", f"Transaction updated: {updated['txn_id']}")
             self.load_recent()
         except Exception as e: